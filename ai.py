@@ -3,34 +3,83 @@ Professional Spam Email Detector - All-in-One Flask Application
 Fixed: Logo display, Spam word highlighting, Animations
 """
 
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from flask_compress import Compress
+from werkzeug.exceptions import RequestEntityTooLarge
 import pickle
 import re
+import string
 import logging
 import os
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple
+from collections import OrderedDict
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import gzip
-
-
-# Configure logging
+import multiprocessing
+import hashlib
+import threading
+import mmap
+import shutil
+import ahocorasick
+import brotli
+import orjson
+import numpy as np
+
+
+# Configure logging. Per-request details are logged at INFO, so production
+# runs at WARNING unless LOG_LEVEL says otherwise.
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.environ.get('LOG_LEVEL', 'WARNING').upper(),
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson for faster request/response (de)serialization"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        # jsonify() ends up here; keep the encoded bytes instead of round-tripping through str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # Configuration
 class Config:
     MODEL_PATH = Path('model.pkl.gz')
+    MODEL_CACHE_PATH = Path('model.pkl')  # decompressed copy of MODEL_PATH
     VECTORIZER_PATH = Path('vectorizer.pkl')
     MAX_TEXT_LENGTH = 50000
     MIN_TEXT_LENGTH = 10
+    # Largest JSON body that can still hold MAX_TEXT_LENGTH characters
+    # (a \uXXXX\uXXXX escape takes 12 bytes for one character)
+    MAX_REQUEST_BYTES = MAX_TEXT_LENGTH * 12 + 1024
+    ANALYSIS_CACHE_SIZE = 1024
+    PREDICTION_CACHE_SIZE = 1024
+    PREDICTION_BATCH_SIZE = 32  # most texts scored by one model call
+    MAX_BATCH_SIZE = 50
+    # Room for MAX_BATCH_SIZE texts of MAX_TEXT_LENGTH each (about 30 MB), so
+    # any batch of valid texts fits under the body limit
+    MAX_BATCH_REQUEST_BYTES = MAX_BATCH_SIZE * MAX_REQUEST_BYTES
+    BATCH_POOL_MIN_SIZE = 8  # smaller batches are analyzed in-process
+    # Per server process: gunicorn -w N can run up to N * 4 pool workers
+    BATCH_POOL_MAX_WORKERS = 4
 
     SPAM_KEYWORDS = [
         # Money & prizes
@@ -79,73 +128,413 @@ class Config:
         'claim your', 'accept', 'approval', 'pending'
     ]
 
-# Load ML models
+
+# Reject oversized bodies before they are read and parsed
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_REQUEST_BYTES
+
+# Compress larger API responses (long spam_words lists, batch results).
+# Responses that already carry a Content-Encoding, like the page, are left alone.
+app.config['COMPRESS_MIN_SIZE'] = 512
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_REGISTER'] = False
+compress = Compress(app)
+
+
+@app.after_request
+def compress_response(response):
+    """Compress the response unless the client refuses both br and gzip"""
+    # Flask-Compress still picks an encoding when every one it offers has q=0
+    if request.accept_encodings.best_match(['br', 'gzip']) is None:
+        response.vary.add('Accept-Encoding')
+        return response
+    return compress.after_request(response)
+
+# Aho-Corasick automaton over all keywords, built once at import. A single
+# pass over the text reports every (overlapping) keyword hit. Nodes store the
+# keyword's index in SPAM_KEYWORDS as a plain C integer instead of a Python
+# object, which keeps the automaton compact and doubles as the sort order.
+# Build it before forking (gunicorn --preload) so workers share its pages.
+KEYWORD_AUTOMATON = ahocorasick.Automaton(ahocorasick.STORE_INTS)
+for _index, _keyword in enumerate(Config.SPAM_KEYWORDS):
+    if _keyword.lower() not in KEYWORD_AUTOMATON:
+        KEYWORD_AUTOMATON.add_word(_keyword.lower(), _index)
+KEYWORD_AUTOMATON.make_automaton()
+KEYWORD_LENGTHS = tuple(len(kw.lower()) for kw in Config.SPAM_KEYWORDS)
+SINGLE_WORD_KEYWORDS = frozenset(i for i, kw in enumerate(Config.SPAM_KEYWORDS) if ' ' not in kw)
+
+# Feature patterns, compiled once. Each feature is computed by a C-level call
+# (str.count, a single search, an early-exit finditer) rather than a Python
+# loop over every match.
+MONEY_SYMBOLS = '$€£¥₹'
+# [!?]{2,} occurs exactly when one of these pairs does
+PUNCT_PAIRS = ('!!', '!?', '?!', '??')
+DIGITS_RE = re.compile(r'\d+')
+URL_HINT_RE = re.compile(r'https?://|www\.')
+URL_RE = re.compile(r'https?://[^\s]+')
+# Same matches as r'\b[\w\.-]+@[\w\.-]+\.\w+\b', but a match may only start at
+# the beginning of a [\w.-] run; the plain version retries from every position
+# in the run and goes quadratic on inputs like 'a.a.a.a...'
+EMAIL_RE = re.compile(r'(?<![\w.-])[.-]*\w[\w.-]*@[\w.-]+\.\w+\b')
+ASCII_UPPER_DELETE = str.maketrans('', '', string.ascii_uppercase)
+
+# preprocess_text patterns
+NON_TOKEN_RE = re.compile(r'[^a-z0-9\s]')
+ASCII_NON_TOKEN_TO_SPACE = str.maketrans({
+    c: ' ' for c in map(chr, range(128))
+    if not (c in string.ascii_lowercase or c in string.digits or c.isspace())
+})
+
+
+def load_pickle_mmap(path: Path):
+    """Unpickle a file straight from a read-only memory map"""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return pickle.loads(mm)
+
+
+def decompress_model(src: Path, dest: Path) -> bool:
+    """Decompress the gzipped model once so later starts skip the gzip decode"""
+    if dest.exists() and dest.stat().st_mtime >= src.stat().st_mtime:
+        return True
+
+    tmp = dest.with_name(f'{dest.name}.{os.getpid()}.tmp')
+    try:
+        with gzip.open(src, 'rb') as f_in, open(tmp, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.replace(tmp, dest)
+        return True
+    except OSError as e:
+        logger.warning("⚠ Could not cache decompressed model at %s: %s", dest, e)
+        tmp.unlink(missing_ok=True)
+        return False
+
+
+class DigestCache:
+    """Thread-safe LRU cache keyed by a digest of a text.
+
+    Keying on a fixed-size digest instead of the text itself means the cache
+    never keeps whole email bodies alive.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: 'OrderedDict[bytes, object]' = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    def get(self, key: bytes):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key: bytes, value) -> None:
+        with self.lock:
+            self.entries[key] = value
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+# analyze() results keyed by the email text, and model predictions keyed by
+# the preprocessed text (different raw texts can share a prediction)
+analysis_cache = DigestCache(Config.ANALYSIS_CACHE_SIZE)
+prediction_cache = DigestCache(Config.PREDICTION_CACHE_SIZE)
+
+# Worker processes for /api/check-spam/batch, created on first use. They must
+# be forked so they inherit the loaded module; under spawn/forkserver each one
+# would re-import this file and reload the model just to extract features, so
+# without fork batches are analyzed in-process instead.
+analysis_pool = None
+analysis_pool_lock = threading.Lock()
+analysis_pool_context = (
+    multiprocessing.get_context('fork')
+    if 'fork' in multiprocessing.get_all_start_methods() else None
+)
+
+# Load ML models. Run gunicorn with --preload so workers share these objects
+# copy-on-write instead of each unpickling its own copy.
 model = None
 vectorizer = None
 
 try:
     if Config.MODEL_PATH.exists() and Config.VECTORIZER_PATH.exists():
-        # model.pkl.gz ko gzip ke through load karo
-        with gzip.open(Config.MODEL_PATH, 'rb') as f:
-            model = pickle.load(f)
+        # model.pkl.gz ko ek baar decompress karke model.pkl se load karo
+        if decompress_model(Config.MODEL_PATH, Config.MODEL_CACHE_PATH):
+            model = load_pickle_mmap(Config.MODEL_CACHE_PATH)
+        else:
+            with gzip.open(Config.MODEL_PATH, 'rb') as f:
+                model = pickle.load(f)
 
         # vectorizer normal pickle se hi rahega
-        with open(Config.VECTORIZER_PATH, 'rb') as f:
-            vectorizer = pickle.load(f)
+        vectorizer = load_pickle_mmap(Config.VECTORIZER_PATH)
 
-        logger.info(f"✓ Model loaded from {Config.MODEL_PATH}")
-        logger.info(f"✓ Vectorizer loaded from {Config.VECTORIZER_PATH}")
+        # The random forest casts its input to float32 before walking the
+        # trees, so have the vectorizer emit float32 directly: half the bytes
+        # per matrix and no float64 -> float32 copy on every predict call
+        vectorizer.dtype = np.float32
+
+        logger.info("✓ Model loaded from %s", Config.MODEL_PATH)
+        logger.info("✓ Vectorizer loaded from %s", Config.VECTORIZER_PATH)
     else:
-        logger.warning(f"⚠ Model files not found. Expected: {Config.MODEL_PATH} and {Config.VECTORIZER_PATH}")
+        logger.warning("⚠ Model files not found. Expected: %s and %s", Config.MODEL_PATH, Config.VECTORIZER_PATH)
         logger.warning("⚠ Using fallback heuristic detection.")
 except Exception as e:
-    logger.error(f"✗ Error loading models: {e}", exc_info=True)
+    logger.error("✗ Error loading models: %s", e, exc_info=True)
     model = None
     vectorizer = None
 
 
 
-def preprocess_text(text: str) -> str:
-    """Clean and normalize text for ML model"""
-    text = text.lower()
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+def preprocess_text(text_lower: str) -> str:
+    """Clean and normalize already-lowercased text for ML model"""
+    # Blank out everything except a-z, 0-9 and whitespace, then collapse runs of
+    # whitespace. ASCII text goes through a translate table instead of a regex.
+    if text_lower.isascii():
+        text = text_lower.translate(ASCII_NON_TOKEN_TO_SPACE)
+    else:
+        text = NON_TOKEN_RE.sub(' ', text_lower)
+    return ' '.join(text.split())
 
 
-def find_spam_keywords(text: str) -> List[str]:
-    """Find spam trigger words in text"""
-    text_lower = text.lower()
-    found = []
-
-    for keyword in Config.SPAM_KEYWORDS:
-        # Handle multi-word phrases differently
-        if ' ' in keyword:
-            # For phrases, use simple case-insensitive search
-            if keyword.lower() in text_lower:
-                found.append(keyword)
-        else:
-            # For single words, use word boundary matching
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                found.append(keyword)
+def _is_word_char(char: str) -> bool:
+    """Same notion of a word character as the regex \\w class"""
+    return char.isalnum() or char == '_'
+
+
+def find_spam_keywords(text_lower: str) -> List[str]:
+    """Find spam trigger words in already-lowercased text"""
+    found = set()
 
-    # Remove duplicates while preserving order
-    return list(dict.fromkeys(found))
+    for end, index in KEYWORD_AUTOMATON.iter(text_lower):
+        if index in found:
+            continue
+
+        # Phrases use a plain substring match, single words need word boundaries
+        if index in SINGLE_WORD_KEYWORDS:
+            start = end - KEYWORD_LENGTHS[index] + 1
+            if start > 0 and _is_word_char(text_lower[start - 1]):
+                continue
+            if end + 1 < len(text_lower) and _is_word_char(text_lower[end + 1]):
+                continue
+        found.add(index)
+
+    # Keep the original keyword order and remove duplicates
+    return [Config.SPAM_KEYWORDS[i] for i in sorted(found)]
+
+
+def count_uppercase(text: str) -> int:
+    """Count uppercase characters without a per-character Python loop"""
+    if text.isascii():
+        return len(text) - len(text.translate(ASCII_UPPER_DELETE))
+    return sum(map(str.isupper, text))
 
 
 def calculate_features(text: str) -> Dict:
     """Extract spam-related features"""
+    # Plain substring checks rule out most texts before any URL regex runs
+    contains_url = ('://' in text or 'www.' in text) and bool(URL_HINT_RE.search(text))
+
     return {
         'length': len(text),
         'word_count': len(text.split()),
-        'excessive_caps': sum(1 for c in text if c.isupper()) / max(len(text), 1) > 0.3,
-        'excessive_punctuation': bool(re.search(r'[!?]{2,}', text)),
-        'contains_url': bool(re.search(r'https?://|www\.', text)),
-        'url_count': len(re.findall(r'https?://[^\s]+', text)),
-        'contains_email': bool(re.search(r'\b[\w\.-]+@[\w\.-]+\.\w+\b', text)),
-        'excessive_numbers': len(re.findall(r'\d+', text)) > 5,
-        'money_symbols': len(re.findall(r'[$€£¥₹]', text))
+        'excessive_caps': count_uppercase(text) / max(len(text), 1) > 0.3,
+        'excessive_punctuation': any(pair in text for pair in PUNCT_PAIRS),
+        'contains_url': contains_url,
+        'url_count': len(URL_RE.findall(text)) if contains_url else 0,
+        'contains_email': '@' in text and bool(EMAIL_RE.search(text)),
+        # Only the sixth digit run matters, so stop scanning there
+        'excessive_numbers': next(islice(DIGITS_RE.finditer(text), 5, None), None) is not None,
+        'money_symbols': sum(map(text.count, MONEY_SYMBOLS))
+    }
+
+
+def analyze(text: str, text_lower: str) -> Tuple[List[str], Dict]:
+    """Extract keywords and features, memoized on a digest of the text"""
+    key = DigestCache.key(text)
+    result = analysis_cache.get(key)
+
+    if result is None:
+        result = find_spam_keywords(text_lower), calculate_features(text)
+        analysis_cache.put(key, result)
+
+    return result
+
+
+def analyze_for_batch(text: str) -> Tuple[List[str], Dict, str]:
+    """Keywords, features and model input for one text (runs in pool workers)"""
+    text_lower = text.lower()
+    return find_spam_keywords(text_lower), calculate_features(text), preprocess_text(text_lower)
+
+
+def get_analysis_pool() -> ProcessPoolExecutor:
+    """Create the batch worker pool on first use"""
+    global analysis_pool
+    with analysis_pool_lock:
+        if analysis_pool is None:
+            analysis_pool = ProcessPoolExecutor(
+                max_workers=min(Config.BATCH_POOL_MAX_WORKERS, os.cpu_count() or 1),
+                mp_context=analysis_pool_context
+            )
+        return analysis_pool
+
+
+def analyze_batch(texts: List[str]) -> List[Tuple[List[str], Dict, str]]:
+    """Run analyze_for_batch over texts, in the worker pool for large batches"""
+    # Feature extraction is pure Python and GIL-bound, so large batches are
+    # spread over worker processes; small ones are not worth the IPC
+    if len(texts) < Config.BATCH_POOL_MIN_SIZE or analysis_pool_context is None:
+        return [analyze_for_batch(text) for text in texts]
+
+    global analysis_pool
+    pool = get_analysis_pool()
+    try:
+        return list(pool.map(analyze_for_batch, texts, chunksize=4))
+    except BrokenProcessPool:
+        # A dead worker (e.g. OOM-killed) breaks the pool for good. Drop it so
+        # the next batch starts a fresh one, and finish this batch in-process.
+        logger.warning("⚠ Batch worker pool broke; it will be recreated on next use")
+        with analysis_pool_lock:
+            if analysis_pool is pool:
+                analysis_pool = None
+        pool.shutdown(wait=False)
+        return [analyze_for_batch(text) for text in texts]
+
+
+def parse_json_body():
+    """Parse the request body as JSON, raising ValueError if it is not valid JSON"""
+    # The body is read once, so skip caching it; malformed JSON comes back
+    # as None instead of raising through the generic error path
+    data = request.get_json(cache=False, silent=True)
+    if data is None:
+        raise ValueError("Invalid JSON")
+    return data
+
+
+def validate_text(text: object) -> str:
+    """Strip the text and check it against the length limits"""
+    if not isinstance(text, str):
+        raise ValueError("Text must be a string")
+
+    text = text.strip()
+
+    if not text:
+        raise ValueError("Text cannot be empty")
+
+    if len(text) < Config.MIN_TEXT_LENGTH:
+        raise ValueError(f"Text must be at least {Config.MIN_TEXT_LENGTH} characters")
+
+    if len(text) > Config.MAX_TEXT_LENGTH:
+        raise ValueError(f"Text exceeds maximum length of {Config.MAX_TEXT_LENGTH} characters")
+
+    return text
+
+
+def predict_ml(processed_texts: List[str]) -> List[Tuple[bool, float]]:
+    """Classify preprocessed texts with one vectorizer/model call for all of them"""
+    text_vectorized = vectorizer.transform(processed_texts)
+
+    try:
+        probabilities = model.predict_proba(text_vectorized)
+    except AttributeError:
+        predictions = model.predict(text_vectorized)
+        confidences = [1.0 if prediction == 1 else 0.8 for prediction in predictions]
+    else:
+        # predict() is the argmax of these same probabilities; deriving it here
+        # saves a second pass over the forest. Row maxima are taken in numpy.
+        predictions = model.classes_.take(probabilities.argmax(axis=1))
+        confidences = probabilities.max(axis=1).tolist()
+
+    return [(bool(prediction), confidence) for prediction, confidence in zip(predictions, confidences)]
+
+
+# One throwaway prediction at import (before gunicorn forks) so the first real
+# request does not pay for sklearn's lazy setup or fault in the model's pages
+if model is not None and vectorizer is not None:
+    try:
+        predict_ml(['warmup text'])
+    except Exception as e:
+        logger.warning("⚠ Model warm-up failed: %s", e)
+
+
+class PredictionBatcher:
+    """Coalesce concurrent single-text predictions into one predict_ml call.
+
+    A background thread scores what is pending (up to max_batch_size texts)
+    as one batch. Requests arriving while a batch is being scored wait for the
+    next one, so batches grow with load while a lone request is scored right
+    away, with no collection window.
+    """
+
+    def __init__(self, max_batch_size: int):
+        self.max_batch_size = max_batch_size
+        self.pending: List[Tuple[str, threading.Event, list]] = []
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def predict(self, processed_text: str) -> Tuple[bool, float]:
+        done = threading.Event()
+        outcome = []
+
+        with self.condition:
+            # Started lazily so each forked worker gets its own thread
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='prediction-batcher', daemon=True)
+                self.thread.start()
+            self.pending.append((processed_text, done, outcome))
+            self.condition.notify()
+
+        done.wait()
+        if isinstance(outcome[0], Exception):
+            raise outcome[0]
+        return outcome[0]
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                batch = self.pending[:self.max_batch_size]
+                del self.pending[:self.max_batch_size]
+
+            try:
+                results = predict_ml([text for text, _, _ in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+
+            for (_, done, outcome), result in zip(batch, results):
+                outcome.append(result)
+                done.set()
+
+
+prediction_batcher = PredictionBatcher(Config.PREDICTION_BATCH_SIZE)
+
+
+def predict_cached(processed_text: str) -> Tuple[bool, float]:
+    """Classify one preprocessed text, reusing the result for repeated texts"""
+    key = DigestCache.key(processed_text)
+    result = prediction_cache.get(key)
+
+    if result is None:
+        result = prediction_batcher.predict(processed_text)
+        prediction_cache.put(key, result)
+
+    return result
+
+
+def build_result(is_spam: bool, confidence: float, spam_keywords: List[str], features: Dict) -> Dict:
+    """Shape one analysis into the API response format"""
+    return {
+        "prediction": "spam" if is_spam else "not spam",
+        "confidence": confidence,
+        "spam_words": spam_keywords,
+        "spam_word_count": len(spam_keywords),
+        "features": features,
+        "timestamp": datetime.utcnow().isoformat() + 'Z',
+        "model_used": model is not None
     }
 
 
@@ -772,11 +1161,16 @@ HTML_TEMPLATE = r'''
     .step-card {
       text-align: center;
       padding: 2rem;
-      transition: transform 0.3s;
+      transition: all 0.6s ease;
       opacity: 0;
       transform: translateY(30px);
     }
 
+    .step-card.visible {
+      opacity: 1;
+      transform: translateY(0);
+    }
+
     .step-card:hover {
       transform: translateY(-10px);
     }
@@ -830,11 +1224,16 @@ HTML_TEMPLATE = r'''
       padding: 2.5rem;
       border-radius: 20px;
       border: 1px solid rgba(255, 255, 255, 0.2);
-      transition: all 0.3s;
+      transition: all 0.6s ease;
       opacity: 0;
       transform: translateY(30px);
     }
 
+    .feature-card.visible {
+      opacity: 1;
+      transform: translateY(0);
+    }
+
     .feature-card:hover {
       transform: translateY(-10px);
       background: rgba(255, 255, 255, 0.15);
@@ -919,6 +1318,31 @@ HTML_TEMPLATE = r'''
       }
     }
 
+    .notification {
+      position: fixed;
+      top: 100px;
+      right: 20px;
+      background: #667eea;
+      color: white;
+      padding: 1rem 2rem;
+      border-radius: 12px;
+      box-shadow: 0 10px 30px rgba(0, 0, 0, 0.3);
+      z-index: 10000;
+      font-weight: 600;
+    }
+
+    .notification[data-type="error"] {
+      background: #ff6b6b;
+    }
+
+    .notification[data-type="success"] {
+      background: #51cf66;
+    }
+
+    .notification[hidden] {
+      display: none;
+    }
+
     @media (max-width: 1024px) {
       .hero-content {
         grid-template-columns: 1fr;
@@ -1220,18 +1644,15 @@ Example: Try pasting a promotional email or suspicious message..."></textarea>
       }
     }
 
-    function readFile(file) {
-      const reader = new FileReader();
-      reader.onload = (e) => {
-        const content = e.target.result;
+    async function readFile(file) {
+      try {
+        const content = await file.text();
         document.getElementById('emailInput').value = content;
         switchInputMethod('text');
         showNotification('File loaded successfully! Click "Check for Spam" to analyze.', 'success');
-      };
-      reader.onerror = () => {
+      } catch (error) {
         showNotification('Error reading file. Please try again.', 'error');
-      };
-      reader.readAsText(file);
+      }
     }
 
     const examples = {
@@ -1274,10 +1695,15 @@ Project Manager`
       }
     }
 
+    // Elements used by checkSpam/displayResults, looked up once
+    const els = Object.fromEntries([
+      'emailInput', 'checkBtn', 'btnText', 'resultsContainer', 'resultIcon',
+      'resultTitle', 'resultDescription', 'confidenceFill', 'confidenceText',
+      'spamWordsSection', 'spamWordsGrid', 'highlightedText', 'analysisGrid'
+    ].map(id => [id, document.getElementById(id)]));
+
     async function checkSpam() {
-      const emailInput = document.getElementById('emailInput');
-      const checkBtn = document.getElementById('checkBtn');
-      const btnText = document.getElementById('btnText');
+      const { emailInput, checkBtn, btnText } = els;
       const text = emailInput.value.trim();
 
       if (!text) {
@@ -1311,7 +1737,7 @@ Project Manager`
         displayResults(data, text);
 
         setTimeout(() => {
-          document.getElementById('resultsContainer').scrollIntoView({
+          els.resultsContainer.scrollIntoView({
             behavior: 'smooth',
             block: 'start'
           });
@@ -1327,19 +1753,17 @@ Project Manager`
     }
 
     function displayResults(data, originalText) {
-      const resultsContainer = document.getElementById('resultsContainer');
-      const resultIcon = document.getElementById('resultIcon');
-      const resultTitle = document.getElementById('resultTitle');
-      const resultDescription = document.getElementById('resultDescription');
-      const confidenceFill = document.getElementById('confidenceFill');
-      const confidenceText = document.getElementById('confidenceText');
-      const spamWordsSection = document.getElementById('spamWordsSection');
-      const spamWordsGrid = document.getElementById('spamWordsGrid');
-      const highlightedText = document.getElementById('highlightedText');
-      const analysisGrid = document.getElementById('analysisGrid');
+      const {
+        resultsContainer, resultIcon, resultTitle, resultDescription,
+        confidenceFill, confidenceText, spamWordsSection, spamWordsGrid,
+        highlightedText, analysisGrid
+      } = els;
 
       const isSpam = data.prediction === 'spam';
-      const confidence = (data.confidence * 100).toFixed(1);
+      const confidence = `${(data.confidence * 100).toFixed(1)}%`;
+      const spamWords = data.spam_words || [];
+      const spamWordCount = data.spam_word_count || 0;
+      const features = data.features;
 
       resultIcon.className = `result-icon ${isSpam ? 'spam' : 'safe'}`;
       resultIcon.textContent = isSpam ? '⚠️' : '✅';
@@ -1351,136 +1775,162 @@ Project Manager`
         ? 'This email contains spam indicators and should be treated with caution.'
         : 'This email appears to be legitimate with no significant spam indicators.';
 
-      confidenceFill.style.width = confidence + '%';
+      confidenceFill.style.width = confidence;
       confidenceFill.style.background = isSpam
         ? 'linear-gradient(90deg, #ff6b6b 0%, #ee5a6f 100%)'
         : 'linear-gradient(90deg, #51cf66 0%, #37b24d 100%)';
-      confidenceText.textContent = `Confidence Score: ${confidence}%`;
+      confidenceText.textContent = `Confidence Score: ${confidence}`;
 
       // Debug: Log the received data
       console.log('API Response:', data);
-      console.log('Spam words received:', data.spam_words);
-      console.log('Spam word count:', data.spam_word_count);
+      console.log('Spam words received:', spamWords);
+      console.log('Spam word count:', spamWordCount);
 
       // Always show spam words section if detected, regardless of prediction
-      if (data.spam_words && data.spam_words.length > 0) {
+      if (spamWords.length > 0) {
         spamWordsSection.style.display = 'block';
-        spamWordsGrid.innerHTML = data.spam_words
-          .map((word, index) => `<div class="spam-word-tag" style="animation-delay: ${index * 0.05}s">${word}</div>`)
-          .join('');
+        const wordsFragment = document.createDocumentFragment();
+        spamWords.forEach((word, index) => {
+          const tag = document.createElement('div');
+          tag.className = 'spam-word-tag';
+          tag.style.animationDelay = `${index * 0.05}s`;
+          tag.textContent = word;
+          wordsFragment.appendChild(tag);
+        });
+        spamWordsGrid.replaceChildren(wordsFragment);
 
         // Highlight spam words in the text
-        const highlighted = highlightSpamWords(originalText, data.spam_words);
+        const highlighted = highlightSpamWords(originalText, spamWords);
         highlightedText.innerHTML = highlighted;
         
-        console.log('Spam words section displayed with', data.spam_words.length, 'keywords');
+        console.log('Spam words section displayed with', spamWords.length, 'keywords');
         console.log('Highlighted text length:', highlighted.length);
       } else {
         spamWordsSection.style.display = 'none';
         console.log('No spam words detected - section hidden');
       }
 
-      const wordCount = originalText.split(/\s+/).filter(w => w).length;
+      const wordCount = countWords(originalText);
       const analysisItems = [
         { label: 'Total Words', value: wordCount, icon: '📝' },
         { label: 'Characters', value: originalText.length, icon: '🔤' },
-        { label: 'Spam Indicators', value: data.spam_word_count || 0, icon: '🎯' },
-        { label: 'Confidence', value: confidence + '%', icon: '📊' }
+        { label: 'Spam Indicators', value: spamWordCount, icon: '🎯' },
+        { label: 'Confidence', value: confidence, icon: '📊' }
       ];
 
-      if (data.features) {
-        if (data.features.excessive_caps) {
+      if (features) {
+        if (features.excessive_caps) {
           analysisItems.push({ label: 'Excessive Caps', value: 'Detected', icon: '⚠️' });
         }
-        if (data.features.excessive_punctuation) {
+        if (features.excessive_punctuation) {
           analysisItems.push({ label: 'Excessive Punctuation', value: 'Detected', icon: '❗' });
         }
-        if (data.features.contains_url) {
+        if (features.contains_url) {
           analysisItems.push({ label: 'Contains URL', value: 'Yes', icon: '🔗' });
         }
       }
 
-      analysisGrid.innerHTML = analysisItems
-        .map(item => `
-          <div class="analysis-item">
-            <div class="analysis-label">${item.icon} ${item.label}</div>
-            <div class="analysis-value">${item.value}</div>
-          </div>
-        `).join('');
+      const analysisFragment = document.createDocumentFragment();
+      analysisItems.forEach(item => {
+        const row = document.createElement('div');
+        row.className = 'analysis-item';
+        const label = document.createElement('div');
+        label.className = 'analysis-label';
+        label.textContent = `${item.icon} ${item.label}`;
+        const value = document.createElement('div');
+        value.className = 'analysis-value';
+        value.textContent = item.value;
+        row.append(label, value);
+        analysisFragment.appendChild(row);
+      });
+      analysisGrid.replaceChildren(analysisFragment);
 
       resultsContainer.classList.add('show');
     }
 
+    // Same characters as \s in a regular expression
+    function isWhitespaceCode(c) {
+      return c === 32 || (c >= 9 && c <= 13) || c === 160 || c === 5760 ||
+        (c >= 8192 && c <= 8202) || c === 8232 || c === 8233 || c === 8239 ||
+        c === 8287 || c === 12288 || c === 65279;
+    }
+
+    // Counts whitespace-separated words without allocating an array of them
+    function countWords(text) {
+      let count = 0;
+      let inWord = false;
+      for (let i = 0; i < text.length; i++) {
+        const isWordChar = !isWhitespaceCode(text.charCodeAt(i));
+        if (isWordChar && !inWord) {
+          count++;
+        }
+        inWord = isWordChar;
+      }
+      return count;
+    }
+
     function highlightSpamWords(text, spamWords) {
       if (!text || !spamWords || spamWords.length === 0) {
         return text;
       }
 
-      let highlighted = text;
-      
-      // Sort spam words by length (longest first) to avoid partial matches
+      // One case-insensitive whole-word alternation, longest words first to
+      // avoid partial matches, so the text is scanned once for all spam words
       const sortedWords = [...spamWords].sort((a, b) => b.length - a.length);
+      const regex = new RegExp('\\b(' + sortedWords.map(escapeRegex).join('|') + ')\\b', 'gi');
 
-      sortedWords.forEach(word => {
-        // Create a case-insensitive regex pattern for whole word matching
-        const escapedWord = escapeRegex(word);
-        const regex = new RegExp('\\b(' + escapedWord + ')\\b', 'gi');
-        
-        // Replace with marked text, preserving original case
-        highlighted = highlighted.replace(regex, '<mark>$1</mark>');
-      });
-
-      console.log('Highlighting complete. Marked words:', spamWords.length);
-      return highlighted;
+      // split() with a capture group puts the matched words at odd indexes;
+      // everything is HTML-escaped since the result is assigned to innerHTML
+      return text.split(regex)
+        .map((part, index) => index % 2 ? `<mark>${escapeHtml(part)}</mark>` : escapeHtml(part))
+        .join('');
     }
 
     function escapeRegex(string) {
-      return string.replace(/[.*+?^${}()|[\]\\]/g, '\\        <div class="result-icon" id="resultIcon"></div>');
+      return string.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
     }
 
-    function showNotification(message, type) {
-      const existing = document.querySelector('.notification');
-      if (existing) {
-        existing.remove();
-      }
+    const htmlEscapes = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
 
-      const notification = document.createElement('div');
-      notification.className = 'notification';
-      notification.style.cssText = `
-        position: fixed;
-        top: 100px;
-        right: 20px;
-        background: ${type === 'error' ? '#ff6b6b' : type === 'success' ? '#51cf66' : '#667eea'};
-        color: white;
-        padding: 1rem 2rem;
-        border-radius: 12px;
-        box-shadow: 0 10px 30px rgba(0,0,0,0.3);
-        z-index: 10000;
-        animation: slideInRight 0.3s ease;
-        font-weight: 600;
-      `;
-      notification.textContent = message;
+    function escapeHtml(string) {
+      return string.replace(/[&<>"']/g, ch => htmlEscapes[ch]);
+    }
 
-      const style = document.createElement('style');
-      style.textContent = `
-        @keyframes slideInRight {
-          from {
-            transform: translateX(400px);
-            opacity: 0;
-          }
-          to {
-            transform: translateX(0);
-            opacity: 1;
-          }
-        }
-      `;
-      document.head.appendChild(style);
+    // A single notification element is created once and reused
+    const notification = document.createElement('div');
+    notification.className = 'notification';
+    notification.hidden = true;
+    document.body.appendChild(notification);
 
-      document.body.appendChild(notification);
+    const slideInRight = [
+      { transform: 'translateX(400px)', opacity: 0 },
+      { transform: 'translateX(0)', opacity: 1 }
+    ];
+    let notificationTimer = null;
+    let notificationExit = null;
 
-      setTimeout(() => {
-        notification.style.animation = 'slideInRight 0.3s ease reverse';
-        setTimeout(() => notification.remove(), 300);
+    function showNotification(message, type) {
+      clearTimeout(notificationTimer);
+      if (notificationExit) {
+        notificationExit.cancel();
+      }
+
+      notification.textContent = message;
+      notification.dataset.type = type;
+      notification.hidden = false;
+      notification.animate(slideInRight, { duration: 300, easing: 'ease' });
+
+      notificationTimer = setTimeout(() => {
+        // fill: 'forwards' keeps it invisible until it is hidden, then the
+        // animation is dropped so it cannot affect the next notification
+        notificationExit = notification.animate(slideInRight, {
+          duration: 300, easing: 'ease', direction: 'reverse', fill: 'forwards'
+        });
+        notificationExit.onfinish = () => {
+          notification.hidden = true;
+          notificationExit.cancel();
+          notificationExit = null;
+        };
       }, 3000);
     }
 
@@ -1509,102 +1959,163 @@ Project Manager`
       rootMargin: '0px 0px -100px 0px'
     };
 
+    // Cards entering the viewport are revealed together in one animation
+    // frame by adding a class, instead of inline style writes per card
+    const pendingReveal = new Set();
+
     const observer = new IntersectionObserver((entries) => {
       entries.forEach(entry => {
         if (entry.isIntersecting) {
-          entry.target.style.opacity = '1';
-          entry.target.style.transform = 'translateY(0)';
+          pendingReveal.add(entry.target);
         }
       });
+
+      if (pendingReveal.size) {
+        requestAnimationFrame(() => {
+          pendingReveal.forEach(el => {
+            el.classList.add('visible');
+            observer.unobserve(el);
+          });
+          pendingReveal.clear();
+        });
+      }
     }, observerOptions);
 
     // Observe all animated elements
-    document.querySelectorAll('.step-card, .feature-card').forEach(el => {
-      el.style.transition = 'all 0.6s ease';
-      observer.observe(el);
-    });
+    document.querySelectorAll('.step-card, .feature-card').forEach(el => observer.observe(el));
   </script>
 </body>
 </html>
 '''
 
 
+# The page has no template variables, so its bytes, brotli/gzip encodings and
+# ETags are computed once instead of going through Jinja on every request
+HTML_BYTES = HTML_TEMPLATE.strip().encode('utf-8')
+HTML_BROTLI_BYTES = brotli.compress(HTML_BYTES, quality=11)
+HTML_GZIP_BYTES = gzip.compress(HTML_BYTES, 9)
+HTML_ETAG = hashlib.blake2b(HTML_BYTES, digest_size=16).hexdigest()
+
+
 @app.route('/')
 def index():
     """Serve the main HTML page"""
-    return render_template_string(HTML_TEMPLATE)
+    # best_match honours q-values, so "br;q=0" or "gzip;q=0" rules that
+    # encoding out and identity is served when neither is acceptable
+    encoding = request.accept_encodings.best_match(['br', 'gzip'])
+    if encoding == 'br':
+        response = Response(HTML_BROTLI_BYTES, mimetype='text/html')
+        response.content_encoding = 'br'
+        response.set_etag(HTML_ETAG + '-br')
+    elif encoding == 'gzip':
+        response = Response(HTML_GZIP_BYTES, mimetype='text/html')
+        response.content_encoding = 'gzip'
+        response.set_etag(HTML_ETAG + '-gzip')
+    else:
+        response = Response(HTML_BYTES, mimetype='text/html')
+        response.set_etag(HTML_ETAG)
+
+    # Browsers revalidate on each visit and get a bodiless 304 when unchanged
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 
 @app.route('/api/check-spam', methods=['POST'])
 def check_spam():
     """API endpoint to analyze text for spam"""
     try:
-        data = request.get_json()
+        data = parse_json_body()
 
-        if not data or 'text' not in data:
+        if not isinstance(data, dict) or 'text' not in data:
             return jsonify({
                 "error": "Please provide 'text' in the request body"
             }), 400
 
-        text = data['text'].strip()
+        text = validate_text(data['text'])
 
-        if not text:
-            return jsonify({
-                "error": "Text cannot be empty"
-            }), 400
+        text_lower = text.lower()
+        spam_keywords, features = analyze(text, text_lower)
+
+        # Debug logging
+        logger.info("Text length: %d characters", len(text))
+        logger.info("Spam keywords found: %d - %s", len(spam_keywords), spam_keywords[:10])  # Show first 10
+
+        if model is not None and vectorizer is not None:
+            is_spam, confidence = predict_cached(preprocess_text(text_lower))
+        else:
+            is_spam, confidence = heuristic_detection(spam_keywords, features)
+
+        result = build_result(is_spam, confidence, spam_keywords, features)
 
-        if len(text) < Config.MIN_TEXT_LENGTH:
+        logger.info("Analysis: %s (confidence: %.2f%%)", result['prediction'], confidence * 100)
+
+        return jsonify(result)
+
+    except RequestEntityTooLarge:
+        raise
+
+    except ValueError as e:
+        logger.warning("Validation error: %s", e)
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        logger.error("Analysis error: %s", e, exc_info=True)
+        return jsonify({
+            "error": "An unexpected error occurred during analysis"
+        }), 500
+
+
+@app.route('/api/check-spam/batch', methods=['POST'])
+def check_spam_batch():
+    """API endpoint to analyze a list of texts for spam in one call"""
+    request.max_content_length = Config.MAX_BATCH_REQUEST_BYTES
+
+    try:
+        data = parse_json_body()
+
+        if not isinstance(data, dict) or not isinstance(data.get('texts'), list) or not data['texts']:
             return jsonify({
-                "error": f"Text must be at least {Config.MIN_TEXT_LENGTH} characters"
+                "error": "Please provide a non-empty 'texts' list in the request body"
             }), 400
 
-        if len(text) > Config.MAX_TEXT_LENGTH:
+        if len(data['texts']) > Config.MAX_BATCH_SIZE:
             return jsonify({
-                "error": f"Text exceeds maximum length of {Config.MAX_TEXT_LENGTH} characters"
+                "error": f"Batch exceeds maximum size of {Config.MAX_BATCH_SIZE} texts"
             }), 400
 
-        spam_keywords = find_spam_keywords(text)
-        features = calculate_features(text)
+        texts = []
+        for i, raw_text in enumerate(data['texts']):
+            try:
+                texts.append(validate_text(raw_text))
+            except ValueError as e:
+                raise ValueError(f"texts[{i}]: {e}") from e
 
-        # Debug logging
-        logger.info(f"Text length: {len(text)} characters")
-        logger.info(f"Spam keywords found: {len(spam_keywords)} - {spam_keywords[:10]}")  # Show first 10
+        analyses = analyze_batch(texts)
 
         if model is not None and vectorizer is not None:
-            processed_text = preprocess_text(text)
-            text_vectorized = vectorizer.transform([processed_text])
-            prediction = model.predict(text_vectorized)[0]
-
-            try:
-                prediction_proba = model.predict_proba(text_vectorized)[0]
-                confidence = float(max(prediction_proba))
-            except AttributeError:
-                confidence = 1.0 if prediction == 1 else 0.8
-
-            is_spam = bool(prediction)
+            predictions = predict_ml([processed for _, _, processed in analyses])
         else:
-            is_spam, confidence = heuristic_detection(spam_keywords, features)
+            predictions = [heuristic_detection(keywords, features) for keywords, features, _ in analyses]
 
-        result = {
-            "prediction": "spam" if is_spam else "not spam",
-            "confidence": confidence,
-            "spam_words": spam_keywords,
-            "spam_word_count": len(spam_keywords),
-            "features": features,
-            "timestamp": datetime.utcnow().isoformat() + 'Z',
-            "model_used": model is not None
-        }
+        results = [
+            build_result(is_spam, confidence, keywords, features)
+            for (is_spam, confidence), (keywords, features, _) in zip(predictions, analyses)
+        ]
 
-        logger.info(f"Analysis: {result['prediction']} (confidence: {confidence:.2%})")
+        logger.info("Batch analysis: %d texts", len(results))
 
-        return jsonify(result)
+        return jsonify({"results": results, "count": len(results)})
+
+    except RequestEntityTooLarge:
+        raise
 
     except ValueError as e:
-        logger.warning(f"Validation error: {e}")
+        logger.warning("Validation error: %s", e)
         return jsonify({"error": str(e)}), 400
 
     except Exception as e:
-        logger.error(f"Analysis error: {e}", exc_info=True)
+        logger.error("Batch analysis error: %s", e, exc_info=True)
         return jsonify({
             "error": "An unexpected error occurred during analysis"
         }), 500
@@ -1627,10 +2138,22 @@ def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
 
 
+@app.errorhandler(413)
+def payload_too_large(error):
+    """Handle 413 errors"""
+    if request.endpoint == 'check_spam':
+        message = f"Text exceeds maximum length of {Config.MAX_TEXT_LENGTH} characters"
+    elif request.endpoint == 'check_spam_batch':
+        message = f"Batch request body exceeds maximum size of {Config.MAX_BATCH_REQUEST_BYTES} bytes"
+    else:
+        message = "Request body too large"
+    return jsonify({"error": message}), 413
+
+
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
-    logger.error(f"Internal error: {error}")
+    logger.error("Internal error: %s", error, exc_info=True)
     return jsonify({"error": "Internal server error"}), 500
 
 
@@ -1655,4 +2178,12 @@ if __name__ == '__main__':
     print("=" * 70 + "\n")
 
     port = int(os.environ.get('PORT', 5000))
-    app.run(debug=False, host='0.0.0.0', port=port, threaded=True)
+    if os.environ.get('FLASK_DEV'):
+        app.run(debug=False, host='0.0.0.0', port=port, threaded=True)
+    else:
+        # Production WSGI server. On Linux, prefer multiple processes so
+        # inference runs on every core (each also gets its own batch pool of
+        # up to Config.BATCH_POOL_MAX_WORKERS processes):
+        #   gunicorn --preload -w $(nproc) -k gthread --threads 4 ai:app
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=port, threads=8)